@@ -0,0 +1,82 @@
+"""
+Shared Neo4j Driver for Graphiti Examples
+
+Builds one pooled, pre-warmed driver per process so scripts don't pay the
+Bolt handshake and pool warmup on every Graphiti client they create.
+
+Usage:
+    from graphiti_client import close_driver, ensure_indices, get_driver
+
+    graphiti = Graphiti(graph_driver=await get_driver())
+    await ensure_indices(graphiti)
+    ...
+    await close_driver()
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from graphiti_core import Graphiti
+from graphiti_core.driver.neo4j_driver import Neo4jDriver
+
+from pooled_driver import connect_pooled_driver
+
+# Load environment variables
+load_dotenv()
+
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+# Connection pool settings (the Python driver has no minimum pool size;
+# verify_connectivity() opens the first connection up front instead)
+POOL_CONFIG = {
+    "max_connection_pool_size": 50,
+    "connection_acquisition_timeout": 30,
+    "keep_alive": True,
+}
+
+_driver: Optional[Neo4jDriver] = None
+_indices: Optional[asyncio.Future] = None
+
+
+async def get_driver() -> Neo4jDriver:
+    """Return the process-wide Graphiti Neo4j driver, creating it on first use."""
+    global _driver
+    if _driver is None:
+        _driver = await connect_pooled_driver(
+            NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, **POOL_CONFIG
+        )
+    return _driver
+
+
+async def ensure_indices(graphiti: Graphiti):
+    """
+    Build Graphiti indices and constraints once per process.
+
+    Graphiti already issues its CREATE INDEX/CONSTRAINT statements
+    concurrently; this makes every caller share that single build instead
+    of reconciling the schema again. A failed build is forgotten so the
+    next call retries it.
+    """
+    global _indices
+    if _indices is None:
+        _indices = asyncio.ensure_future(graphiti.build_indices_and_constraints())
+    build = _indices
+    try:
+        await build
+    except BaseException:
+        if _indices is build:
+            _indices = None
+        raise
+
+
+async def close_driver():
+    """Close the shared driver, if it was created."""
+    global _driver, _indices
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
+    _indices = None
@@ -0,0 +1,65 @@
+"""
+Graphiti Neo4j Driver with Custom Pool Settings
+
+Neo4jDriver always opens its own AsyncDriver with stock pool settings and,
+when a loop is running, schedules an index build. connect_pooled_driver
+keeps the Neo4jDriver but cancels that build (indices are built once by the
+caller) and swaps in an AsyncDriver with the requested pool settings.
+
+Requires graphiti-core 0.30.x.
+
+Usage:
+    from pooled_driver import connect_pooled_driver
+
+    driver = await connect_pooled_driver(uri, user, password, max_connection_pool_size=50)
+    graphiti = Graphiti(graph_driver=driver)
+"""
+
+import asyncio
+from contextlib import suppress
+from typing import Optional
+
+from graphiti_core.driver.neo4j_driver import Neo4jDriver
+from neo4j import AsyncGraphDatabase
+
+
+async def connect_pooled_driver(
+    uri: str,
+    user: str,
+    password: Optional[str],
+    **pool_config
+) -> Neo4jDriver:
+    """
+    Build a Graphiti Neo4j driver with the given pool settings and verify it.
+
+    The tuned client is closed again if the connectivity check fails.
+
+    Args:
+        uri: Bolt URI of the Neo4j server
+        user: Neo4j user
+        password: Neo4j password
+        **pool_config: Extra AsyncGraphDatabase.driver() settings
+
+    Returns:
+        Graphiti driver using the verified client
+    """
+    # AsyncGraphDatabase.driver() connects lazily, so the default client
+    # Neo4jDriver builds here never opens a connection
+    driver = Neo4jDriver(uri=uri, user=user, password=password)
+
+    init_task = getattr(driver, "_init_task", None)
+    if init_task is not None:
+        init_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await init_task
+
+    default_client = driver.client
+    driver.client = AsyncGraphDatabase.driver(uri, auth=(user, password or ""), **pool_config)
+    await default_client.close()
+
+    try:
+        await driver.client.verify_connectivity()
+    except Exception:
+        await driver.close()
+        raise
+    return driver
@@ -9,54 +9,110 @@ This example demonstrates:
 - Langfuse observability integration
 
 Requirements:
-    pip install graphiti-core[neo4j] langfuse python-dotenv
+    pip install "graphiti-core>=0.30.2,<0.31" "langfuse>=4,<5" python-dotenv numpy
+    pip install scikit-learn  # Optional: PCA-compressed cache lookups
+    pip install orjson  # Optional: faster JSON episode encoding
 
 Usage:
     python quickstart_chatbot.py
 """
 
 import asyncio
+import json
 import os
+import re
+import sys
+import uuid
+from collections import deque
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from graphiti_core import Graphiti
 from graphiti_core.nodes import EpisodeType
+from graphiti_core.search.search import search as graph_search
+from graphiti_core.search.search_config_recipes import EDGE_HYBRID_SEARCH_RRF
+from graphiti_core.search.search_filters import SearchFilters
+from graphiti_core.utils.bulk_utils import RawEpisode
+
+from graphiti_client import close_driver, ensure_indices, get_driver
+from semantic_cache import EmbeddingReducer, SemanticCache
+
+# Optional: Faster JSON encoding of episode bodies (pip install orjson)
+try:
+    import orjson
+
+    def dumps_json(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    dumps_json = json.dumps
 
 # Optional: Enable Langfuse tracing
 try:
-    from langfuse.decorators import observe
+    from langfuse import Langfuse
 except ImportError:
     # Fallback if Langfuse not installed
-    def observe(name=None):
-        def decorator(func):
-            return func
-        return decorator
+    Langfuse = None
+else:
+    if not hasattr(Langfuse, "start_observation"):
+        # Older SDKs lack the observation API used below; run untraced
+        Langfuse = None
 
 # Load environment variables
 load_dotenv()
 
+# Graph partition for shared product knowledge; chat episodes are
+# partitioned per user so searches only scan that user's memories
+CATALOG_GROUP_ID = "product_catalog"
+
+# Same edge search Graphiti.search runs, limited to 5 facts
+CONTEXT_SEARCH_CONFIG = EDGE_HYBRID_SEARCH_RRF.model_copy(update={"limit": 5})
+
 
 class MemoryChatbot:
     """A simple chatbot with persistent episodic memory using Graphiti."""
     
-    def __init__(self):
-        """Initialize the chatbot with Graphiti connection."""
-        self.graphiti = Graphiti(
-            uri=os.getenv("NEO4J_URI", "bolt://localhost:7687"),
-            user=os.getenv("NEO4J_USER", "neo4j"),
-            password=os.getenv("NEO4J_PASSWORD")
-        )
+    def __init__(self, driver=None):
+        """
+        Initialize the chatbot with Graphiti connection.
+        
+        Args:
+            driver: Shared Graphiti Neo4j driver; a private connection is
+                created (and closed with the bot) when omitted
+        """
+        if driver is not None:
+            self.graphiti = Graphiti(graph_driver=driver)
+        else:
+            self.graphiti = Graphiti(
+                uri=os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+                user=os.getenv("NEO4J_USER", "neo4j"),
+                password=os.getenv("NEO4J_PASSWORD")
+            )
+        self._owns_driver = driver is None
+        
+        # Spans are created explicitly against a pre-generated trace id;
+        # @observe would walk inspect.stack() on every chat turn
+        self._langfuse = Langfuse() if Langfuse is not None else None
+        # W3C trace id (32 hex chars), grouping every turn of this chat
+        self._trace_id = uuid.uuid4().hex
         self.conversation_count = 0
         self.user_name = None
+        self._episode_buffer: list[RawEpisode] = []
+        # Search result caches, one per user so context never leaks,
+        # sharing a single PCA reducer for compressed lookups
+        self._qcache: dict[str, SemanticCache] = {}
+        self._reducer = EmbeddingReducer()
+        # Query embeddings of the last few turns, used as cache context.
+        # Responses are derived from the retrieved context, so user turns
+        # alone capture the conversation state without extra embedding calls.
+        self._history: deque[list[float]] = deque(maxlen=6)
     
     async def initialize(self):
         """Set up the knowledge graph indices and constraints."""
         print("🔧 Initializing knowledge graph...")
-        await self.graphiti.build_indices_and_constraints()
+        await ensure_indices(self.graphiti)
         print("✅ Chatbot initialized with memory!\n")
     
     async def load_product_knowledge(self):
-        """Load initial product catalog as JSON episode."""
+        """Load initial product catalog as JSON episodes."""
         print("📚 Loading product knowledge...")
         
         product_catalog = {
@@ -91,17 +147,30 @@ class MemoryChatbot:
             ]
         }
         
-        await self.graphiti.add_episode(
-            name="product_catalog_initial",
-            episode_body=str(product_catalog),
-            source=EpisodeType.json,
-            source_description="Product database import",
-            reference_time=datetime.now(timezone.utc)
+        # One JSON episode per product, ingested together in a single batch
+        now = datetime.now(timezone.utc)
+        await self.graphiti.add_episode_bulk(
+            [
+                RawEpisode(
+                    name=f"product_{product['name']}",
+                    content=dumps_json(product),
+                    source=EpisodeType.json,
+                    source_description="Product database import",
+                    reference_time=now
+                )
+                for product in product_catalog["products"]
+            ],
+            group_id=CATALOG_GROUP_ID
         )
         
         print("✅ Product knowledge loaded!\n")
     
-    @observe(name="chat_interaction")
+    @property
+    def group_id(self) -> str:
+        """Graph partition for the current user's chat episodes."""
+        # Graphiti group ids only allow letters, digits, dashes and underscores
+        return re.sub(r"[^A-Za-z0-9_-]", "_", self.user_name or "anonymous")
+    
     async def process_message(self, message: str) -> str:
         """
         Process user message and generate response with context.
@@ -112,52 +181,117 @@ class MemoryChatbot:
         Returns:
             Assistant's response based on knowledge graph context
         """
-        # Store user message as episode
-        await self.graphiti.add_episode(
-            name=f"user_message_{self.conversation_count}",
-            episode_body=f"{self.user_name}: {message}",
-            source=EpisodeType.message,
-            source_description="User chat input",
-            reference_time=datetime.now(timezone.utc)
-        )
+        # One timestamp for both episodes of this turn
+        now = datetime.now(timezone.utc)
         
-        # Search for relevant context
-        context_results = await self.graphiti.search(
-            query=message,
-            num_results=5
-        )
+        span = None
+        if self._langfuse is not None:
+            span = self._langfuse.start_observation(
+                trace_context={"trace_id": self._trace_id},
+                name="chat_interaction",
+                input=message
+            )
         
-        # Generate response based on context
-        if context_results:
-            # Format context as bullet points
-            context_items = []
-            for result in context_results:
-                # Extract the fact from the result
-                if hasattr(result, 'fact'):
-                    context_items.append(f"• {result.fact}")
-                elif hasattr(result, 'content'):
-                    context_items.append(f"• {result.content}")
+        try:
+            # Ingest the user message (together with the previous turn's
+            # response) while searching for context. The search may not see this
+            # message yet, which is fine: it is no useful context for itself.
+            self._episode_buffer.append(RawEpisode(
+                name=f"user_message_{self.conversation_count}",
+                content=f"{self.user_name}: {message}",
+                source=EpisodeType.message,
+                source_description="User chat input",
+                reference_time=now
+            ))
+            # Let both finish before surfacing a failure, so neither is left
+            # running in the background
+            flushed, context_results = await asyncio.gather(
+                self._flush_episodes(),
+                self._retrieve_context(message),
+                return_exceptions=True
+            )
+            for result in (flushed, context_results):
+                if isinstance(result, BaseException):
+                    raise result
             
-            if context_items:
-                context_str = "\n".join(context_items)
-                response = f"Based on what I know:\n{context_str}\n\nHow else can I help you?"
+            # Generate response based on context
+            if context_results:
+                # Format context as bullet points
+                context_items = []
+                for result in context_results:
+                    # Extract the fact (edges) or content (episodes) from the result
+                    text = getattr(result, 'fact', None) or getattr(result, 'content', None)
+                    if text:
+                        context_items.append(f"• {text}")
+                
+                if context_items:
+                    context_str = "\n".join(context_items)
+                    response = f"Based on what I know:\n{context_str}\n\nHow else can I help you?"
+                else:
+                    response = "I'm still learning about your preferences. Could you tell me more?"
             else:
-                response = "I'm still learning about your preferences. Could you tell me more?"
-        else:
-            response = "I'm here to help! Tell me what you're looking for."
-        
-        # Store assistant response as episode
-        await self.graphiti.add_episode(
-            name=f"assistant_response_{self.conversation_count}",
-            episode_body=f"Assistant: {response}",
-            source=EpisodeType.message,
-            source_description="Assistant response",
-            reference_time=datetime.now(timezone.utc)
-        )
+                response = "I'm here to help! Tell me what you're looking for."
+            
+            # Buffer assistant response; it is ingested with the next message
+            self._episode_buffer.append(RawEpisode(
+                name=f"assistant_response_{self.conversation_count}",
+                content=f"Assistant: {response}",
+                source=EpisodeType.message,
+                source_description="Assistant response",
+                reference_time=now
+            ))
+            
+            if span is not None:
+                span.update(output=response)
+        finally:
+            # End the span even when the turn fails
+            if span is not None:
+                span.end()
         
         self.conversation_count += 1
         return response
     
+    async def _retrieve_context(self, message: str) -> list:
+        """Search for context, reusing results of near-duplicate queries asked in a similar conversation."""
+        query_embedding = await self.graphiti.embedder.create(input_data=[message])
+        cache = self._qcache.get(self.user_name)
+        if cache is None:
+            cache = self._qcache[self.user_name] = SemanticCache(reducer=self._reducer)
+        context_results = cache.lookup(query_embedding, history=self._history)
+        if context_results is None:
+            # Reuse the cache key embedding rather than embedding the message again
+            results = await graph_search(
+                clients=self.graphiti.clients,
+                query=message,
+                group_ids=[self.group_id, CATALOG_GROUP_ID],
+                config=CONTEXT_SEARCH_CONFIG,
+                search_filter=SearchFilters(),
+                query_vector=query_embedding
+            )
+            context_results = results.edges
+            cache.insert(query_embedding, context_results, history=self._history)
+        self._history.append(query_embedding)
+        return context_results
+    
+    async def _flush_episodes(self):
+        """
+        Ingest buffered chat turns in one add_episode_bulk call.
+        
+        Since graphiti-core 0.30 bulk ingestion resolves and invalidates edges
+        like add_episode, so "actually I'm size 11 now" still supersedes an
+        earlier size; older releases skip invalidation in the bulk path.
+        Turns are put back in the buffer if ingestion fails.
+        """
+        if not self._episode_buffer:
+            return
+        
+        episodes, self._episode_buffer = self._episode_buffer, []
+        try:
+            await self.graphiti.add_episode_bulk(episodes, group_id=self.group_id)
+        except Exception:
+            self._episode_buffer = episodes + self._episode_buffer
+            raise
+    
     async def demonstrate_temporal_update(self):
         """Show how Graphiti handles temporal fact updates."""
         print("\n📅 Demonstrating temporal updates...")
@@ -168,6 +302,7 @@ class MemoryChatbot:
             episode_body="Wool Runners are on sale for $79 this week only",
             source=EpisodeType.text,
             source_description="Marketing promotion",
+            group_id=CATALOG_GROUP_ID,
             reference_time=datetime(2024, 3, 4, timezone.utc)  # Monday
         )
         
@@ -177,24 +312,32 @@ class MemoryChatbot:
             episode_body="Wool Runners sale extended - now $69 for clearance",
             source=EpisodeType.text,
             source_description="Clearance update",
+            group_id=CATALOG_GROUP_ID,
             reference_time=datetime(2024, 3, 6, timezone.utc)  # Wednesday
         )
         
         print("✅ Temporal updates recorded - latest facts will supersede old ones\n")
     
     async def close(self):
-        """Clean up Graphiti connection."""
-        await self.graphiti.close()
+        """Flush pending episodes and clean up Graphiti connection."""
+        await self._flush_episodes()
+        if self._langfuse is not None:
+            self._langfuse.flush()
+        if self._owns_driver:
+            await self.graphiti.close()
 
 
 async def interactive_chat_loop(bot: MemoryChatbot):
     """Run the interactive chat interface."""
-    print("🤖 Chatbot ready! Type 'quit' to exit.")
-    print("💡 Try asking about:")
-    print("   - 'I need running shoes'")
-    print("   - 'What shoes do you have in size 11?'")
-    print("   - 'I have wide feet'")
-    print("   - 'What's on sale?'\n")
+    # Write multi-line blocks in one call rather than one print per line
+    sys.stdout.write(
+        "🤖 Chatbot ready! Type 'quit' to exit.\n"
+        "💡 Try asking about:\n"
+        "   - 'I need running shoes'\n"
+        "   - 'What shoes do you have in size 11?'\n"
+        "   - 'I have wide feet'\n"
+        "   - 'What's on sale?'\n\n"
+    )
     
     # Get user name
     bot.user_name = input("What's your name? ")
@@ -213,18 +356,20 @@ async def interactive_chat_loop(bot: MemoryChatbot):
         
         # Process message and get response
         response = await bot.process_message(message)
-        print(f"\n🤖 Assistant: {response}\n")
+        sys.stdout.write(f"\n🤖 Assistant: {response}\n\n")
+        sys.stdout.flush()
 
 
 async def main():
     """Main entry point for the chatbot application."""
-    print("=" * 60)
-    print("   Graphiti Memory Chatbot - Quickstart Example")
-    print("=" * 60)
-    print()
+    sys.stdout.write(
+        "=" * 60 + "\n"
+        "   Graphiti Memory Chatbot - Quickstart Example\n"
+        + "=" * 60 + "\n\n"
+    )
     
-    # Create and initialize chatbot
-    bot = MemoryChatbot()
+    # Create and initialize chatbot on the shared, pre-warmed driver
+    bot = MemoryChatbot(driver=await get_driver())
     
     try:
         # Initialize knowledge graph
@@ -242,6 +387,7 @@ async def main():
     finally:
         # Clean up
         await bot.close()
+        await close_driver()
         print("\n✅ Connection closed. Goodbye!")
 
 
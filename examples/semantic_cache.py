@@ -0,0 +1,288 @@
+"""
+Semantic Cache for Graphiti Search Results
+
+Near-duplicate questions ("size 11 shoes?" vs "shoes in size 11?") return
+the cached search results of an earlier query instead of hitting Neo4j
+again. Queries are matched by cosine similarity of their embeddings, and
+of the recent conversation they were asked in.
+
+Once enough queries have been seen, embeddings are compressed with PCA so
+lookups scan a small (N, 128) matrix instead of the full embedding width.
+Large caches can opt in to an HNSW index (ann_threshold) instead of the
+linear scan once they grow past a given size.
+
+Requirements:
+    pip install numpy
+    pip install scikit-learn  # Optional: PCA compression
+    pip install hnswlib  # Optional: ANN lookups for large caches
+"""
+
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class EmbeddingReducer:
+    """PCA projection fitted on the first embeddings it observes."""
+
+    def __init__(self, n_components: int = 128, sample_size: int = 512):
+        """
+        Args:
+            n_components: Dimensions kept after projection
+            sample_size: Embeddings collected before fitting
+        """
+        self.n_components = n_components
+        self.sample_size = sample_size
+
+        self._samples: List[np.ndarray] = []
+        self._mean: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+        self._disabled = False
+
+    @property
+    def fitted(self) -> bool:
+        return self._components is not None
+
+    def observe(self, vector: np.ndarray):
+        """Collect a sample; fit once sample_size embeddings have been seen."""
+        if self.fitted or self._disabled:
+            return
+
+        if vector.shape[0] <= self.n_components:
+            # Already small enough, nothing to gain
+            self._disabled = True
+            return
+
+        self._samples.append(vector)
+        if len(self._samples) >= self.sample_size:
+            self._fit()
+
+    def _fit(self):
+        try:
+            from sklearn.decomposition import IncrementalPCA
+        except ImportError:
+            # Fall back to full-dimension lookups
+            self._disabled = True
+            self._samples = []
+            return
+
+        pca = IncrementalPCA(n_components=self.n_components)
+        pca.fit(np.stack(self._samples))
+        self._mean = pca.mean_.astype(np.float32)
+        self._components = pca.components_.astype(np.float32)
+        self._samples = []
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Project normalized embeddings and renormalize the result."""
+        return _normalize_rows((vectors - self._mean) @ self._components.T)
+
+
+class SemanticCache:
+    """
+    Fixed-capacity LRU cache keyed by query embedding similarity.
+
+    Matching is two-tier so a follow-up like "what about size 11?" only hits
+    when the conversation leading up to it was similar too:
+    1. Prefilter cached queries by query-only cosine similarity
+    2. Accept the best candidate by similarity of the fused
+       [mean(history) ⊕ query] vector
+    """
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        threshold: float = 0.95,
+        prefilter: float = 0.9,
+        reducer: Optional[EmbeddingReducer] = None,
+        margin: float = 0.02,
+        top_k: int = 5,
+        ann_threshold: Optional[int] = None
+    ):
+        """
+        Args:
+            capacity: Maximum number of cached queries
+            threshold: Minimum fused query+history similarity for a cache hit
+            prefilter: Minimum query-only similarity for a candidate
+            reducer: Shared PCA reducer; lookups stay full-dimension without one
+            margin: Slack applied to the prefilter in reduced space before
+                candidates are re-checked at full dimension
+            top_k: Maximum candidates passed to the fused comparison
+            ann_threshold: Entry count above which the prefilter uses an HNSW
+                index instead of a linear scan (requires hnswlib); must be
+                below capacity. None always uses the linear scan.
+        """
+        if ann_threshold is not None and ann_threshold >= capacity:
+            raise ValueError(
+                f"ann_threshold ({ann_threshold}) must be below capacity ({capacity}); "
+                "the cache never holds more than capacity entries"
+            )
+
+        self.capacity = capacity
+        self.threshold = threshold
+        self.prefilter = prefilter
+        self.reducer = reducer
+        self.margin = margin
+        self.top_k = top_k
+        self.ann_threshold = ann_threshold
+
+        # L2-normalized float32 rows, allocated on first insert
+        self._vectors: Optional[np.ndarray] = None
+        self._contexts: Optional[np.ndarray] = None
+        self._reduced: Optional[np.ndarray] = None
+        self._ann = None
+        self._values: List[Any] = []
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._clock = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        return _normalize_rows(np.asarray(embedding, dtype=np.float32))
+
+    def _context(self, history: Sequence[Sequence[float]], dim: int) -> np.ndarray:
+        """Normalized mean of the history embeddings (zeros without history)."""
+        if not len(history):
+            return np.zeros(dim, dtype=np.float32)
+        return _normalize_rows(_normalize_rows(np.asarray(history, dtype=np.float32)).mean(axis=0))
+
+    def _sync_reduced(self):
+        """Project cached rows once the shared reducer has been fitted."""
+        if self._reduced is not None or self.reducer is None or not self.reducer.fitted:
+            return
+        self._reduced = np.empty((self.capacity, self.reducer.n_components), dtype=np.float32)
+        if self._values:
+            self._reduced[:len(self._values)] = self.reducer.transform(self._vectors[:len(self._values)])
+        # Rebuilt in the reduced space on next use
+        self._ann = None
+
+    def _keys(self) -> np.ndarray:
+        """Rows the prefilter compares against (reduced when available)."""
+        return self._vectors if self._reduced is None else self._reduced
+
+    def _sync_ann(self):
+        """Build the HNSW index once the cache outgrows the linear scan."""
+        count = len(self._values)
+        if (
+            self._ann is not None
+            or hnswlib is None
+            or self.ann_threshold is None
+            or count <= self.ann_threshold
+        ):
+            return
+        keys = self._keys()
+        self._ann = hnswlib.Index(space="cosine", dim=keys.shape[1])
+        self._ann.init_index(max_elements=self.capacity, ef_construction=200, M=16)
+        self._ann.add_items(keys[:count], np.arange(count))
+
+    def _touch(self, slot: int):
+        self._clock += 1
+        self._last_used[slot] = self._clock
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        """Slots whose cached query passes the query-only prefilter."""
+        count = len(self._values)
+        if self._reduced is None:
+            key = query
+            cutoff = self.prefilter
+        else:
+            key = self.reducer.transform(query)
+            cutoff = self.prefilter - self.margin
+
+        k = min(self.top_k, count)
+        self._sync_ann()
+        if self._ann is not None:
+            labels, distances = self._ann.knn_query(key, k=k)
+            top = labels[0].astype(np.intp)
+            top = top[1 - distances[0] >= cutoff]
+        else:
+            sims = self._keys()[:count] @ key
+            top = np.argpartition(sims, -k)[-k:]
+            top = top[sims[top] >= cutoff]
+
+        # Re-check reduced-space candidates at full dimension
+        if self._reduced is not None and len(top):
+            top = top[self._vectors[top] @ query >= self.prefilter]
+        return top
+
+    def lookup(
+        self,
+        embedding: Sequence[float],
+        history: Sequence[Sequence[float]] = ()
+    ) -> Optional[Any]:
+        """
+        Return cached results for a similar query in a similar context.
+
+        Args:
+            embedding: Query embedding
+            history: Embeddings of the preceding conversation turns
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        query = self._normalize(embedding)
+        if self.reducer is not None:
+            self.reducer.observe(query)
+            self._sync_reduced()
+
+        if not self._values:
+            return None
+
+        candidates = self._candidates(query)
+        if not len(candidates):
+            return None
+
+        # Cosine of the fused [context ⊕ query] vectors, from their parts
+        context = self._context(history, query.shape[0])
+        context_norms = np.linalg.norm(self._contexts[candidates], axis=1)
+        fused_sims = (
+            (self._contexts[candidates] @ context + self._vectors[candidates] @ query)
+            / (np.sqrt(1 + context_norms ** 2) * np.sqrt(1 + context @ context))
+        )
+        best = int(np.argmax(fused_sims))
+        if fused_sims[best] < self.threshold:
+            return None
+
+        slot = int(candidates[best])
+        self._touch(slot)
+        return self._values[slot]
+
+    def insert(
+        self,
+        embedding: Sequence[float],
+        value: Any,
+        history: Sequence[Sequence[float]] = ()
+    ):
+        """Cache results for a query, evicting the least recently used entry."""
+        vector = self._normalize(embedding)
+        if self._vectors is None:
+            self._vectors = np.empty((self.capacity, vector.shape[0]), dtype=np.float32)
+            self._contexts = np.empty_like(self._vectors)
+        self._sync_reduced()
+
+        if len(self._values) < self.capacity:
+            slot = len(self._values)
+            self._values.append(value)
+        else:
+            slot = int(np.argmin(self._last_used))
+            self._values[slot] = value
+
+        self._vectors[slot] = vector
+        self._contexts[slot] = self._context(history, vector.shape[0])
+        if self._reduced is not None:
+            self._reduced[slot] = self.reducer.transform(vector)
+        if self._ann is not None:
+            # Re-adding an existing label replaces the evicted entry
+            self._ann.add_items(self._keys()[slot], slot)
+        self._touch(slot)
@@ -10,90 +10,106 @@ Usage:
 
 import asyncio
 import os
+import sys
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from graphiti_core import Graphiti
 from graphiti_core.nodes import EpisodeType
+from graphiti_core.utils.bulk_utils import RawEpisode
+from neo4j.exceptions import AuthError, ServiceUnavailable
+
+from graphiti_client import close_driver, ensure_indices, get_driver
 
 # Load environment variables
 load_dotenv()
 
+# Keep test data in its own graph partition
+TEST_GROUP_ID = "test"
+
 
 async def test_graphiti_connection():
     """Test basic Graphiti operations."""
     
-    print("🔌 Connecting to Neo4j...")
-    print(f"   URI: {os.getenv('NEO4J_URI', 'bolt://localhost:7687')}")
-    print(f"   User: {os.getenv('NEO4J_USER', 'neo4j')}")
-    
-    # Initialize Graphiti client
-    client = Graphiti(
-        uri=os.getenv("NEO4J_URI", "bolt://localhost:7687"),
-        user=os.getenv("NEO4J_USER", "neo4j"),
-        password=os.getenv("NEO4J_PASSWORD")
+    # Each block is written in one call rather than one print per line
+    sys.stdout.write(
+        "🔌 Connecting to Neo4j...\n"
+        f"   URI: {os.getenv('NEO4J_URI', 'bolt://localhost:7687')}\n"
+        f"   User: {os.getenv('NEO4J_USER', 'neo4j')}\n"
     )
     
     try:
+        # Initialize Graphiti client on the shared, pre-warmed driver
+        client = Graphiti(graph_driver=await get_driver())
+        
         # Build indices
         print("\n📊 Building indices and constraints...")
-        await client.build_indices_and_constraints()
+        await ensure_indices(client)
         print("✅ Indices ready!")
         
-        # Test 1: Add TEXT episode
-        print("\n📝 Test 1: Adding TEXT episode...")
-        await client.add_episode(
+        # Tests 1-3: Collect TEXT, JSON and MESSAGE episodes, ingest in one batch
+        now = datetime.now(timezone.utc)
+        
+        episodes = [RawEpisode(
             name="test_text_episode",
-            episode_body="John Smith is looking for comfortable running shoes in size 10",
+            content="John Smith is looking for comfortable running shoes in size 10",
             source=EpisodeType.text,
             source_description="Test text input",
-            reference_time=datetime.now(timezone.utc)
-        )
-        print("✅ TEXT episode added")
+            reference_time=now
+        )]
         
-        # Test 2: Add JSON episode
-        print("\n📋 Test 2: Adding JSON episode...")
-        await client.add_episode(
+        episodes.append(RawEpisode(
             name="test_json_episode",
-            episode_body='{"customer": "John Smith", "preference": "comfortable shoes", "size": 10}',
+            content='{"customer": "John Smith", "preference": "comfortable shoes", "size": 10}',
             source=EpisodeType.json,
             source_description="Test JSON input",
-            reference_time=datetime.now(timezone.utc)
-        )
-        print("✅ JSON episode added")
+            reference_time=now
+        ))
         
-        # Test 3: Add MESSAGE episode
-        print("\n💬 Test 3: Adding MESSAGE episode...")
-        await client.add_episode(
+        episodes.append(RawEpisode(
             name="test_message_episode",
-            episode_body="Customer: I need size 10 shoes\nAgent: Let me help you find the perfect fit",
+            content="Customer: I need size 10 shoes\nAgent: Let me help you find the perfect fit",
             source=EpisodeType.message,
             source_description="Test conversation",
-            reference_time=datetime.now(timezone.utc)
+            reference_time=now
+        ))
+        
+        sys.stdout.write(
+            "\n📝 Test 1: Adding TEXT episode...\n"
+            "\n📋 Test 2: Adding JSON episode...\n"
+            "\n💬 Test 3: Adding MESSAGE episode...\n"
         )
-        print("✅ MESSAGE episode added")
+        sys.stdout.flush()
+        await client.add_episode_bulk(episodes, group_id=TEST_GROUP_ID)
+        print("✅ TEXT, JSON and MESSAGE episodes added")
         
         # Test 4: Search
         print("\n🔍 Test 4: Searching knowledge graph...")
-        results = await client.search("John Smith shoes size 10", num_results=5)
-        print(f"✅ Found {len(results)} results")
+        results = await client.search(
+            "John Smith shoes size 10", group_ids=[TEST_GROUP_ID], num_results=5
+        )
+        lines = [f"✅ Found {len(results)} results"]
         
         if results:
-            print("\n📊 Search Results:")
+            lines.append("\n📊 Search Results:")
             for i, result in enumerate(results[:3], 1):
-                if hasattr(result, 'fact'):
-                    print(f"   {i}. {result.fact}")
-                elif hasattr(result, 'content'):
-                    print(f"   {i}. {result.content}")
+                text = getattr(result, 'fact', None) or getattr(result, 'content', None)
+                if text:
+                    lines.append(f"   {i}. {text}")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         # Test 5: Temporal update
         print("\n⏰ Test 5: Testing temporal updates...")
         
+        # Added one at a time: bulk ingestion skips edge invalidation,
+        # which is exactly what this test exercises
+        
         # Original fact
         await client.add_episode(
             name="temporal_test_1",
             episode_body="Product ABC costs $100",
             source=EpisodeType.text,
-            reference_time=datetime(2024, 1, 1, timezone.utc)
+            reference_time=datetime(2024, 1, 1, timezone.utc),
+            group_id=TEST_GROUP_ID
         )
         
         # Updated fact (supersedes the original)
@@ -101,20 +117,25 @@ async def test_graphiti_connection():
             name="temporal_test_2",
             episode_body="Product ABC now costs $80 due to sale",
             source=EpisodeType.text,
-            reference_time=datetime(2024, 1, 15, timezone.utc)
+            reference_time=datetime(2024, 1, 15, timezone.utc),
+            group_id=TEST_GROUP_ID
         )
         print("✅ Temporal facts recorded (newer supersedes older)")
         
         # Final search
         print("\n🎯 Final search for 'Product ABC price'...")
-        price_results = await client.search("Product ABC price", num_results=3)
+        price_results = await client.search(
+            "Product ABC price", group_ids=[TEST_GROUP_ID], num_results=3
+        )
         if price_results:
             print("   Latest price should be $80 (not $100)")
         
-        print("\n" + "="*50)
-        print("✅ All tests completed successfully!")
-        print("="*50)
+        sys.stdout.write("\n" + "="*50 + "\n✅ All tests completed successfully!\n" + "="*50 + "\n")
         
+    except (ServiceUnavailable, AuthError) as e:
+        # Expected when Neo4j is down or credentials are wrong; no traceback needed
+        print(f"\n❌ {type(e).__name__}: {e}")
+    
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
@@ -122,7 +143,7 @@ async def test_graphiti_connection():
     
     finally:
         # Clean up
-        await client.close()
+        await close_driver()
         print("\n🔌 Connection closed")
 
 
@@ -10,6 +10,7 @@ Fixes known issues with Graphiti when using Neo4j as the backend:
 
 import os
 import sys
+import importlib.util
 import logging
 from pathlib import Path
 from typing import Optional, Dict, Any
@@ -41,24 +42,17 @@ class GraphitiNeo4jPatcher:
         if custom_path:
             return Path(custom_path)
             
-        # Try common locations
-        possible_paths = [
-            Path.cwd() / "graphiti_core",
-            Path.home() / ".local/lib/python*/site-packages/graphiti_core",
-            Path("/usr/local/lib/python*/site-packages/graphiti_core"),
-            Path("./venv/lib/python*/site-packages/graphiti_core"),
-        ]
-        
-        for path_pattern in possible_paths:
-            matches = list(Path("/").glob(str(path_pattern).lstrip("/")))
-            if matches:
-                logger.info(f"Found Graphiti at: {matches[0]}")
-                return matches[0]
-                
-        raise FileNotFoundError(
-            "Could not find Graphiti installation. "
-            "Please specify path explicitly."
-        )
+        # Resolve through the import system instead of scanning the filesystem
+        spec = importlib.util.find_spec("graphiti_core")
+        if spec is None or spec.origin is None:
+            raise FileNotFoundError(
+                "Could not find Graphiti installation. "
+                "Please specify path explicitly."
+            )
+            
+        path = Path(spec.origin).parent
+        logger.info(f"Found Graphiti at: {path}")
+        return path
     
     def patch_async_sync_sessions(self) -> bool:
         """
@@ -187,20 +181,65 @@ Prevents OOM by monitoring memory before operations
 
 import psutil
 import asyncio
-from typing import Any, Dict, Optional
+import time
+from collections.abc import Iterator, Sequence
+from itertools import islice
+from typing import Any, Dict, Iterable, Optional
 from graphiti_core import Graphiti
 
+# Reuse a memory reading for this long (seconds) between batches
+MEMORY_SAMPLE_INTERVAL = 0.2
+
+def _chunked(iterable: Iterable, size: int) -> Iterator:
+    """Yield batches of up to size items, one at a time"""
+    if isinstance(iterable, Sequence):
+        # Slicing keeps str batches as substrings
+        for i in range(0, len(iterable), size):
+            yield iterable[i:i + size]
+        return
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
 class MemorySafeGraphiti:
     """Wrapper that checks memory before operations"""
     
-    def __init__(self, *args, memory_threshold: float = 0.8, **kwargs):
+    def __init__(self, *args, memory_threshold: float = 0.8,
+                 max_concurrent: int = 1, **kwargs):
         self.graphiti = Graphiti(*args, **kwargs)
         self.memory_threshold = memory_threshold
+        self.max_concurrent = max_concurrent
+        self._last_mem_check = 0.0
+        self._last_mem_percent = 0.0
+        
+    @staticmethod
+    def _read_memory_percent() -> float:
+        """Read system memory usage, parsing /proc/meminfo directly on Linux"""
+        try:
+            with open('/proc/meminfo', 'rb') as f:
+                meminfo = f.read()
+        except OSError:
+            return psutil.virtual_memory().percent
+            
+        fields = {}
+        for line in meminfo.splitlines():
+            key, _, value = line.partition(b':')
+            if key in (b'MemTotal', b'MemAvailable'):
+                fields[key] = int(value.split()[0])
+                if len(fields) == 2:
+                    break
+                    
+        if len(fields) < 2:
+            return psutil.virtual_memory().percent
+        return 100.0 * (1 - fields[b'MemAvailable'] / fields[b'MemTotal'])
         
     def check_memory(self) -> bool:
-        """Check if memory usage is safe"""
-        memory = psutil.virtual_memory()
-        usage_percent = memory.percent / 100
+        """Check if memory usage is safe, using a sample at most 200ms old"""
+        now = time.monotonic()
+        if now - self._last_mem_check >= MEMORY_SAMPLE_INTERVAL:
+            self._last_mem_percent = self._read_memory_percent()
+            self._last_mem_check = now
+        usage_percent = self._last_mem_percent / 100
         
         if usage_percent > self.memory_threshold:
             raise MemoryError(
@@ -213,21 +252,21 @@ class MemorySafeGraphiti:
         """Add episode with memory checks"""
         self.check_memory()
         
-        # If episode is large, process in batches
-        if hasattr(args[0], '__len__') and len(args[0]) > batch_size:
-            results = []
-            data = args[0]
+        # If episode is large (or a lazy iterator), process in batches
+        data = args[0]
+        if isinstance(data, Iterator) or (hasattr(data, '__len__') and len(data) > batch_size):
+            # Workers pull batches from one shared generator, so at most
+            # max_concurrent batches are materialized at a time
+            batches = enumerate(_chunked(data, batch_size))
+            results = {}
             
-            for i in range(0, len(data), batch_size):
-                self.check_memory()  # Check before each batch
-                batch = data[i:i+batch_size]
-                result = await self.graphiti.add_episode(batch, *args[1:], **kwargs)
-                results.append(result)
-                
-                # Small delay between batches
-                await asyncio.sleep(0.1)
-                
-            return results
+            async def _worker():
+                for index, batch in batches:
+                    self.check_memory()  # Check before each batch
+                    results[index] = await self.graphiti.add_episode(batch, *args[1:], **kwargs)
+                    
+            await asyncio.gather(*[_worker() for _ in range(self.max_concurrent)])
+            return [results[index] for index in range(len(results))]
         else:
             return await self.graphiti.add_episode(*args, **kwargs)
             
@@ -242,7 +281,8 @@ if __name__ == "__main__":
         "bolt://localhost:7687",
         "neo4j",
         "password",
-        memory_threshold=0.75  # Stop at 75% memory usage
+        memory_threshold=0.75,  # Stop at 75% memory usage
+        max_concurrent=1  # Matches SEMAPHORE_LIMIT
     )
     
     # Now use normally - will raise MemoryError if threshold exceeded
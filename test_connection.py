@@ -4,35 +4,30 @@ Test Neo4j connection and Graphiti initialization.
 """
 
 import asyncio
-import os
-from dotenv import load_dotenv
+import sys
+from pathlib import Path
 from graphiti_core import Graphiti
 from graphiti_core.nodes import EpisodeType
+from neo4j.exceptions import AuthError, ServiceUnavailable
 
-# Load environment variables
-load_dotenv()
-
-# Neo4j connection settings
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")  # No default - must be set in .env
+# Reuse the shared, pre-warmed driver from the examples. examples/ is a
+# folder of scripts rather than an installable package, so it has to be on
+# sys.path before graphiti_client can be imported.
+sys.path.insert(0, str(Path(__file__).parent / "examples"))
+from graphiti_client import NEO4J_URI, NEO4J_USER, close_driver, ensure_indices, get_driver
 
 async def test_connection():
     print(f"Connecting to Neo4j at {NEO4J_URI}")
     print(f"User: {NEO4J_USER}")
     
     try:
-        # Initialize Graphiti client
-        client = Graphiti(
-            uri=NEO4J_URI,
-            user=NEO4J_USER,
-            password=NEO4J_PASSWORD
-        )
+        # Initialize Graphiti client on the shared driver
+        client = Graphiti(graph_driver=await get_driver())
         
         print("✓ Graphiti client initialized successfully")
         
         # Try a simple operation
-        await client.build_indices_and_constraints()
+        await ensure_indices(client)
         print("✓ Indices and constraints built")
         
         # Add a test episode
@@ -53,14 +48,20 @@ async def test_connection():
         results = await client.search("testing", num_results=5)
         print(f"✓ Search completed, found {len(results)} results")
         
-        await client.close()
-        print("✓ Connection closed successfully")
         print("\n✅ All tests passed\! Neo4j and Graphiti are working correctly.")
         
+    except (ServiceUnavailable, AuthError) as e:
+        # Expected when Neo4j is down or credentials are wrong; no traceback needed
+        print(f"✗ {type(e).__name__}: {e}")
+        
     except Exception as e:
         print(f"✗ Error: {e}")
         import traceback
         traceback.print_exc()
+    
+    finally:
+        await close_driver()
+        print("✓ Connection closed")
 
 if __name__ == "__main__":
     asyncio.run(test_connection())
@@ -3,74 +3,104 @@ Pytest configuration and fixtures for Neo4j Graphiti tests.
 """
 
 import asyncio
+import functools
+import gc
 import os
+import sys
 import time
 import logging
-from typing import AsyncGenerator, Dict, Any, List
+from collections import OrderedDict
 from datetime import datetime, timezone
+from typing import AsyncGenerator, Dict, Any, Sequence, Tuple
 from pathlib import Path
 
 import pytest
 import pytest_asyncio
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter
 from graphiti_core import Graphiti
+from graphiti_core.driver.neo4j_driver import Neo4jDriver
 from graphiti_core.nodes import EpisodeType
 from graphiti_core.edges import EntityEdge
-from graphiti_core.utils.maintenance.graph_data_operations import clear_data
 
-# Load environment variables
-load_dotenv()
+from fixtures.warmup_data import warmup_page_cache
+
+# The pooled driver helper lives with the examples, which are scripts
+# rather than a package
+sys.path.insert(0, str(Path(__file__).parent.parent / "examples"))
+from pooled_driver import connect_pooled_driver
+
+# Use uvloop for the session loop when installed (not available on Windows)
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Neo4j connection settings - OrbStack domains only
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://neo4j.graphiti.local:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")  # No default - must be set via 1Password
-# Neo4j database is specified at connection, not at client init
-
 # Test configuration
 WARMUP_ITERATIONS = 3
 BENCHMARK_ROUNDS = 5
 MAX_RETRIES = 3
-RETRY_WAIT_MIN = 1
-RETRY_WAIT_MAX = 5
+RETRY_WAIT_INITIAL = 0.2
+RETRY_WAIT_MAX = 2.0
+WARMUP_CONCURRENCY = 10
+CLEAR_BATCH_SIZE = 10000
+# Node labels Graphiti partitions by group_id (each has a group_id index)
+GRAPHITI_GROUP_LABELS = ("Episodic", "Entity", "Community")
+EMBEDDING_CACHE_SIZE = 256
+NEO4J_MAX_CONNECTION_LIFETIME = 3600
 
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+@functools.lru_cache(maxsize=1)
+def neo4j_settings() -> Dict[str, Any]:
+    """
+    Neo4j connection settings, loading .env once on first use.
+    """
+    load_dotenv()
+    return {
+        # OrbStack domains only; the database is specified at connection,
+        # not at client init
+        "uri": os.getenv("NEO4J_URI", "bolt://neo4j.graphiti.local:7687"),
+        "user": os.getenv("NEO4J_USER", "neo4j"),
+        "password": os.getenv("NEO4J_PASSWORD"),  # No default - must be set via 1Password
+        # Driver connection pool; keep the pool at least as large as the
+        # concurrency of gather-based batches (INGEST_CONCURRENCY in warmup_data)
+        "pool_size": int(os.getenv("NEO4J_POOL", "32")),
+        "acquisition_timeout": float(os.getenv("NEO4J_ACQ_TIMEOUT", "10"))
+    }
 
 
-@pytest_asyncio.fixture(scope="session")
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def graphiti_client() -> AsyncGenerator[Graphiti, None]:
     """
     Create a Graphiti client connected to Neo4j.
     Session-scoped to reuse across tests.
     """
-    logger.info(f"Connecting to Neo4j at {NEO4J_URI}")
+    settings = neo4j_settings()
+    logger.info(f"Connecting to Neo4j at {settings['uri']}")
     
+    # Retry only the cheap connectivity probe; jitter keeps parallel
+    # workers from reconnecting in lockstep against a just-started Neo4j
     @retry(
         stop=stop_after_attempt(MAX_RETRIES),
-        wait=wait_exponential(multiplier=1, min=RETRY_WAIT_MIN, max=RETRY_WAIT_MAX)
+        wait=wait_exponential_jitter(initial=RETRY_WAIT_INITIAL, max=RETRY_WAIT_MAX)
     )
-    async def connect():
-        client = Graphiti(
-            uri=NEO4J_URI,
-            user=NEO4J_USER,
-            password=NEO4J_PASSWORD
+    async def connect() -> Neo4jDriver:
+        return await connect_pooled_driver(
+            settings["uri"],
+            settings["user"],
+            settings["password"],
+            max_connection_pool_size=settings["pool_size"],
+            connection_acquisition_timeout=settings["acquisition_timeout"],
+            max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME
         )
-        # Verify connectivity
-        await client.build_indices_and_constraints()
-        return client
     
-    client = await connect()
+    client = Graphiti(graph_driver=await connect())
+    await client.build_indices_and_constraints()
     logger.info("Successfully connected to Neo4j via Graphiti")
     
     yield client
@@ -80,64 +110,177 @@ async def graphiti_client() -> AsyncGenerator[Graphiti, None]:
     logger.info("Closed Graphiti connection")
 
 
-@pytest_asyncio.fixture
-async def clean_graphiti(graphiti_client: Graphiti):
+@pytest.fixture(scope="session")
+def worker_group_id() -> str:
+    """
+    Graphiti group_id owned by this pytest-xdist worker ("gw0" when not
+    running under xdist). Tests write and search inside it so workers
+    can share one database.
     """
-    Provides a clean Graphiti instance for each test.
-    Clears data before and after test execution.
+    return os.getenv("PYTEST_XDIST_WORKER", "gw0")
+
+
+async def clear_graph(driver, group_id: str):
+    """
+    Delete one group's nodes and their relationships, keeping indices,
+    constraints and other workers' data.
+    Deletes in batches so large graphs don't build one huge transaction.
+    """
+    # CALL { ... } IN TRANSACTIONS needs an implicit (auto-commit) transaction
+    async with driver.session() as session:
+        # Match per label so each query can use that label's group_id index
+        for label in GRAPHITI_GROUP_LABELS:
+            result = await session.run(
+                f"MATCH (n:{label}) WHERE n.group_id = $group_id "
+                "CALL { WITH n DETACH DELETE n } "
+                f"IN TRANSACTIONS OF {CLEAR_BATCH_SIZE} ROWS",
+                group_id=group_id
+            )
+            await result.consume()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def isolated_graphiti(graphiti_client: Graphiti, worker_group_id: str):
+    """
+    Provides a graph with no data in this worker's group for tests that
+    need isolation.
+    Clears the group before and after test execution; indices are built
+    once per session by graphiti_client.
+    
+    Wired automatically for tests marked with @pytest.mark.isolated.
     """
     # Clear before test
-    logger.info("Clearing graph data before test")
-    await clear_data(graphiti_client.driver)
-    await graphiti_client.build_indices_and_constraints()
+    logger.info(f"Clearing group {worker_group_id} before test")
+    await clear_graph(graphiti_client.driver, worker_group_id)
     
     yield graphiti_client
     
     # Clear after test
-    logger.info("Clearing graph data after test")
-    await clear_data(graphiti_client.driver)
+    logger.info(f"Clearing group {worker_group_id} after test")
+    await clear_graph(graphiti_client.driver, worker_group_id)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def page_cache_warmed(graphiti_client: Graphiti):
+    """
+    Warms the Neo4j page cache once per session with plain Cypher scans.
+    """
+    logger.info("Warming up Neo4j page cache")
+    await warmup_page_cache(graphiti_client)
+    yield graphiti_client
 
 
-@pytest_asyncio.fixture
-async def warmed_graphiti(graphiti_client: Graphiti):
+@pytest_asyncio.fixture(loop_scope="session")
+async def warmed_graphiti(page_cache_warmed: Graphiti, worker_group_id: str, request):
     """
     Provides a Graphiti instance with warmed cache.
-    Performs warmup queries to ensure JVM and caches are hot.
+    The page cache is warmed once per session; tests marked with
+    @pytest.mark.warmup additionally run Graphiti searches to warm the
+    client-side caches.
     """
-    logger.info("Warming up Neo4j caches")
+    graphiti_client = page_cache_warmed
     
-    # Add sample data for warmup
-    warmup_episodes = [
-        "User John is interested in comfortable walking shoes",
-        "Product ManyBirds Wool Runners are made from merino wool",
-        "Customer service handled John's return request"
-    ]
+    if request.node.get_closest_marker("warmup"):
+        logger.info("Warming up Graphiti search caches")
+        
+        # Add sample data for warmup
+        warmup_episodes = [
+            "User John is interested in comfortable walking shoes",
+            "Product ManyBirds Wool Runners are made from merino wool",
+            "Customer service handled John's return request"
+        ]
+        
+        # Bound concurrency so warmup never exhausts the driver's connection pool
+        semaphore = asyncio.Semaphore(WARMUP_CONCURRENCY)
+        
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+        
+        now = datetime.now(timezone.utc)
+        await asyncio.gather(*[
+            bounded(graphiti_client.add_episode(
+                name=f"warmup_{i}",
+                episode_body=episode,
+                source=EpisodeType.text,
+                reference_time=now,
+                source_description="warmup",
+                group_id=worker_group_id
+            ))
+            for i, episode in enumerate(warmup_episodes)
+        ])
+        
+        # Perform warmup searches
+        searches = []
+        for _ in range(WARMUP_ITERATIONS):
+            searches.append(graphiti_client.search_nodes("shoes", max_nodes=10))
+            searches.append(graphiti_client.search_facts("comfortable", max_facts=10))
+        await asyncio.gather(*[bounded(search) for search in searches])
+        
+        logger.info("Cache warmup complete")
     
-    for i, episode in enumerate(warmup_episodes):
-        await graphiti_client.add_episode(
-            name=f"warmup_{i}",
-            episode_body=episode,
-            source=EpisodeType.text,
-            reference_time=datetime.now(timezone.utc),
-            source_description="warmup"
-        )
+    yield graphiti_client
+
+
+@pytest.fixture(scope="session")
+def embedding_store() -> "OrderedDict[Tuple[str, Tuple[str, ...]], Any]":
+    """
+    Query embeddings shared across tests by embedding_cache.
+    """
+    return OrderedDict()
+
+
+@pytest.fixture
+def embedding_cache(graphiti_client: Graphiti, embedding_store, monkeypatch, request):
+    """
+    Serves graphiti_client's query embeddings from an LRU.
+    Repeated queries skip the embedding API, so search timings measure
+    Neo4j rather than embedding latency.
     
-    # Perform warmup searches
-    for _ in range(WARMUP_ITERATIONS):
-        await graphiti_client.search_nodes("shoes", max_nodes=10)
-        await graphiti_client.search_facts("comfortable", max_facts=10)
+    Returns hit/miss counters; a miss is a call to the real embedder.
+    Tests marked with @pytest.mark.cold get the real embedder.
+    """
+    stats = {"hits": 0, "misses": 0}
+    if request.node.get_closest_marker("cold"):
+        return stats
     
-    logger.info("Cache warmup complete")
+    embedder = graphiti_client.embedder
+    create = embedder.create
+    model = getattr(getattr(embedder, "config", None), "embedding_model", type(embedder).__name__)
     
-    yield graphiti_client
+    async def cached_create(input_data, *args, **kwargs):
+        # Graphiti passes search queries as a one-element list
+        if isinstance(input_data, str):
+            texts = (input_data,)
+        elif isinstance(input_data, (list, tuple)) and all(isinstance(t, str) for t in input_data):
+            texts = tuple(input_data)
+        else:
+            return await create(input_data, *args, **kwargs)
+        
+        key = (model, texts)
+        if key in embedding_store:
+            stats["hits"] += 1
+            embedding_store.move_to_end(key)
+            return embedding_store[key]
+        
+        stats["misses"] += 1
+        embedding = await create(input_data, *args, **kwargs)
+        embedding_store[key] = embedding
+        if len(embedding_store) > EMBEDDING_CACHE_SIZE:
+            embedding_store.popitem(last=False)
+        return embedding
+    
+    monkeypatch.setattr(embedder, "create", cached_create)
+    return stats
 
 
-@pytest.fixture
-def sample_episodes() -> List[Dict[str, Any]]:
+@pytest.fixture(scope="session")
+def sample_episodes() -> Tuple[Dict[str, Any], ...]:
     """
     Provides sample episode data for testing.
+    Shared across the session; treat it as read-only.
     """
-    return [
+    return (
         {
             "name": "Customer Inquiry",
             "body": "John: I'm looking for running shoes in size 10",
@@ -156,7 +299,7 @@ def sample_episodes() -> List[Dict[str, Any]]:
             "source": EpisodeType.text,
             "description": "Transaction record"
         }
-    ]
+    )
 
 
 @pytest.fixture
@@ -174,28 +317,31 @@ def performance_metrics() -> Dict[str, float]:
     }
 
 
-@pytest_asyncio.fixture
-async def populated_graphiti(clean_graphiti: Graphiti, sample_episodes: List[Dict[str, Any]]):
+@pytest_asyncio.fixture(loop_scope="session")
+async def populated_graphiti(
+    isolated_graphiti: Graphiti,
+    worker_group_id: str,
+    sample_episodes: Sequence[Dict[str, Any]]
+):
     """
     Provides a Graphiti instance populated with sample data.
     """
     logger.info("Populating graph with sample episodes")
     
+    now = datetime.now(timezone.utc)
     for episode in sample_episodes:
-        await clean_graphiti.add_episode(
+        await isolated_graphiti.add_episode(
             name=episode["name"],
             episode_body=episode["body"],
             source=episode["source"],
-            reference_time=datetime.now(timezone.utc),
-            source_description=episode["description"]
+            reference_time=now,
+            source_description=episode["description"],
+            group_id=worker_group_id
         )
     
-    # Allow time for processing
-    await asyncio.sleep(1)
-    
     logger.info("Sample data population complete")
     
-    yield clean_graphiti
+    yield isolated_graphiti
 
 
 @pytest.fixture
@@ -208,11 +354,29 @@ def benchmark_config() -> Dict[str, Any]:
         "warmup_iterations": WARMUP_ITERATIONS,
         "min_rounds": BENCHMARK_ROUNDS,
         "max_time": 10.0,
-        "disable_gc": True,
+        "disable_gc": False,
         "timer": time.perf_counter
     }
 
 
+@pytest.fixture(autouse=True)
+def frozen_gc(request):
+    """
+    Freeze surviving objects around benchmark tests.
+    
+    GC stays enabled during measurement; frozen objects are skipped by
+    collections, so rounds don't pay to rescan fixture state.
+    """
+    if not (request.node.get_closest_marker("benchmark") or "benchmark" in request.fixturenames):
+        yield
+        return
+    
+    gc.collect()
+    gc.freeze()
+    yield
+    gc.unfreeze()
+
+
 async def get_user_node_uuid(client: Graphiti, user_name: str) -> str:
     """
     Helper to get a user's node UUID.
@@ -225,20 +389,29 @@ async def get_user_node_uuid(client: Graphiti, user_name: str) -> str:
     return None
 
 
-async def wait_for_processing(client: Graphiti, max_wait: float = 5.0):
+async def wait_for_processing(client: Graphiti, episode_uuid: str, max_wait: float = 5.0) -> bool:
     """
-    Wait for episode processing to complete.
-    Useful after add_episode operations.
-    """
-    await asyncio.sleep(0.5)  # Initial delay
+    Wait for an episode's entity extraction to land in the graph.
+    add_episode already returns after extraction is saved, so this is only
+    needed for episodes ingested elsewhere.
     
-    start = time.time()
-    while time.time() - start < max_wait:
-        # Check if processing is complete by attempting a search
-        results = await client.search_nodes("test", max_nodes=1)
-        if results:
-            break
-        await asyncio.sleep(0.1)
+    Probes the episode's MENTIONS edges directly (one index lookup, no
+    embedding) with exponential backoff. Returns False on timeout; episodes
+    that mention no entities never become ready.
+    """
+    delay = 0.05
+    start = time.monotonic()
+    while time.monotonic() - start < max_wait:
+        records, _, _ = await client.driver.execute_query(
+            "MATCH (e:Episodic {uuid: $uuid}) "
+            "RETURN EXISTS { (e)-[:MENTIONS]->() } AS ready",
+            uuid=episode_uuid
+        )
+        if records and records[0]["ready"]:
+            return True
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.4)
+    return False
 
 
 @pytest.fixture
@@ -272,4 +445,17 @@ def pytest_configure(config):
     )
     config.addinivalue_line(
         "markers", "warmup: Tests requiring cache warmup"
-    )
\ No newline at end of file
+    )
+    config.addinivalue_line(
+        "markers", "isolated: Tests that need an empty graph before and after"
+    )
+    config.addinivalue_line(
+        "markers", "cold: Tests that measure cold paths (no embedding cache)"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Clear graph data only around tests marked as isolated."""
+    for item in items:
+        if item.get_closest_marker("isolated") and "isolated_graphiti" not in item.fixturenames:
+            item.fixturenames.append("isolated_graphiti")
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Unit tests for the example semantic search cache.
+Pure numpy; no Neo4j or embedding API needed.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The examples are scripts, not a package; import the module from its folder
+sys.path.insert(0, str(Path(__file__).parent.parent / "examples"))
+from semantic_cache import EmbeddingReducer, SemanticCache
+
+DIM = 8
+
+
+def basis(index: int) -> list:
+    """Unit embedding along one axis; distinct axes are orthogonal."""
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[index] = 1.0
+    return vector.tolist()
+
+
+def test_lookup_hits_similar_query():
+    """A near-duplicate query returns the cached value."""
+    cache = SemanticCache(capacity=4)
+    cache.insert(basis(0), "shoes")
+    
+    nearby = np.array(basis(0)) + 0.01 * np.array(basis(1))
+    assert cache.lookup(basis(0)) == "shoes"
+    assert cache.lookup(nearby.tolist()) == "shoes"
+
+
+def test_lookup_misses_unrelated_query():
+    """Empty caches and dissimilar queries miss."""
+    cache = SemanticCache(capacity=4)
+    assert cache.lookup(basis(0)) is None
+    
+    cache.insert(basis(0), "shoes")
+    assert cache.lookup(basis(1)) is None
+
+
+def test_lookup_requires_similar_context():
+    """The same query asked after a different conversation misses."""
+    cache = SemanticCache(capacity=4)
+    cache.insert(basis(0), "size 11 runners", history=[basis(2)])
+    
+    assert cache.lookup(basis(0), history=[basis(3)]) is None
+    assert cache.lookup(basis(0), history=[basis(2)]) == "size 11 runners"
+
+
+def test_insert_evicts_least_recently_used():
+    """A full cache replaces the entry that was used longest ago."""
+    cache = SemanticCache(capacity=2)
+    cache.insert(basis(0), "first")
+    cache.insert(basis(1), "second")
+    
+    # Touch the older entry so the second one becomes least recently used
+    assert cache.lookup(basis(0)) == "first"
+    cache.insert(basis(2), "third")
+    
+    assert len(cache) == 2
+    assert cache.lookup(basis(0)) == "first"
+    assert cache.lookup(basis(1)) is None
+    assert cache.lookup(basis(2)) == "third"
+
+
+def test_ann_index_hits_and_replaces_evicted_entries():
+    """Past ann_threshold the HNSW prefilter serves hits and tracks evictions."""
+    pytest.importorskip("hnswlib")
+    
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((60, 64)).astype(np.float32)
+    cache = SemanticCache(capacity=50, ann_threshold=20)
+    
+    for i in range(30):
+        cache.insert(vectors[i], i)
+    assert cache.lookup(vectors[0]) == 0
+    assert cache._ann is not None
+    for i in range(30):
+        assert cache.lookup(vectors[i]) == i
+    
+    # Fill the cache, then evict the ten least recently used (0-9); their
+    # index labels are reused by the new entries
+    for i in range(30, 60):
+        cache.insert(vectors[i], i)
+    
+    assert len(cache) == 50
+    for i in range(10):
+        assert cache.lookup(vectors[i]) is None
+    for i in range(10, 60):
+        assert cache.lookup(vectors[i]) == i
+
+
+def test_reducer_projects_existing_entries_once_fitted():
+    """Entries cached before the PCA fit are projected and still hit after it."""
+    pytest.importorskip("sklearn")
+    
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((6, 16)).astype(np.float32)
+    reducer = EmbeddingReducer(n_components=4, sample_size=8)
+    cache = SemanticCache(capacity=16, reducer=reducer)
+    
+    for i in range(6):
+        cache.insert(vectors[i], i)
+    
+    # Lookups feed the reducer; the eighth one triggers the fit
+    for i in range(7):
+        assert cache.lookup(vectors[i % 6]) == i % 6
+        assert not reducer.fitted
+    assert cache.lookup(vectors[0]) == 0
+    assert reducer.fitted
+    
+    assert cache._reduced is not None
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.testing.assert_allclose(cache._reduced[:6], reducer.transform(normalized), atol=1e-5)
+    for i in range(6):
+        assert cache.lookup(vectors[i]) == i
+
+
+def test_ann_threshold_must_be_below_capacity():
+    """An ANN threshold the cache can never reach is rejected."""
+    with pytest.raises(ValueError):
+        SemanticCache(capacity=256, ann_threshold=1024)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -5,38 +5,14 @@ Tests the actual Graphiti API methods available.
 
 import asyncio
 import time
-import json
 from datetime import datetime, timezone
 import pytest
-from graphiti_core import Graphiti
 from graphiti_core.nodes import EpisodeType
-from dotenv import load_dotenv
-import os
+from fixtures.warmup_data import dumps_json
 
-# Load environment variables
-load_dotenv()
 
-# Neo4j connection settings
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")  # No default - must be set in .env
-
-
-@pytest.fixture
-async def graphiti_client():
-    """Create a Graphiti client for testing."""
-    client = Graphiti(
-        uri=NEO4J_URI,
-        user=NEO4J_USER,
-        password=NEO4J_PASSWORD
-    )
-    await client.build_indices_and_constraints()
-    yield client
-    await client.close()
-
-
-@pytest.mark.asyncio
-async def test_episode_text_processing(graphiti_client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_episode_text_processing(graphiti_client, worker_group_id):
     """Test adding and searching text episodes."""
     # Add a text episode
     await graphiti_client.add_episode(
@@ -44,19 +20,17 @@ async def test_episode_text_processing(graphiti_client):
         episode_body="Customer John Smith is looking for comfortable running shoes in size 10",
         source=EpisodeType.text,
         source_description="Customer support chat",
-        reference_time=datetime.now(timezone.utc)
+        reference_time=datetime.now(timezone.utc),
+        group_id=worker_group_id
     )
     
-    # Wait for processing
-    await asyncio.sleep(2)
-    
     # Search for it
-    results = await graphiti_client.search("running shoes", num_results=5)
+    results = await graphiti_client.search("running shoes", group_ids=[worker_group_id], num_results=5)
     assert len(results) > 0, "Should find results for 'running shoes'"
 
 
-@pytest.mark.asyncio
-async def test_episode_json_processing(graphiti_client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_episode_json_processing(graphiti_client, worker_group_id):
     """Test adding and searching JSON episodes."""
     # Add a JSON episode
     product_data = {
@@ -71,22 +45,20 @@ async def test_episode_json_processing(graphiti_client):
     
     await graphiti_client.add_episode(
         name="product_catalog_entry",
-        episode_body=json.dumps(product_data),
+        episode_body=dumps_json(product_data),
         source=EpisodeType.json,
         source_description="Product catalog update",
-        reference_time=datetime.now(timezone.utc)
+        reference_time=datetime.now(timezone.utc),
+        group_id=worker_group_id
     )
     
-    # Wait for processing
-    await asyncio.sleep(2)
-    
     # Search for it
-    results = await graphiti_client.search("Wool Runners", num_results=5)
+    results = await graphiti_client.search("Wool Runners", group_ids=[worker_group_id], num_results=5)
     assert len(results) >= 0, "Should process JSON episode"
 
 
-@pytest.mark.asyncio
-async def test_episode_message_processing(graphiti_client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_episode_message_processing(graphiti_client, worker_group_id):
     """Test adding and searching message episodes."""
     # Add a message episode
     conversation = """Customer: I need help with my order
@@ -99,19 +71,17 @@ Agent: Let me look that up for you"""
         episode_body=conversation,
         source=EpisodeType.message,
         source_description="Customer support transcript",
-        reference_time=datetime.now(timezone.utc)
+        reference_time=datetime.now(timezone.utc),
+        group_id=worker_group_id
     )
     
-    # Wait for processing
-    await asyncio.sleep(2)
-    
     # Search for it
-    results = await graphiti_client.search("order help", num_results=5)
+    results = await graphiti_client.search("order help", group_ids=[worker_group_id], num_results=5)
     assert len(results) >= 0, "Should process message episode"
 
 
-@pytest.mark.asyncio
-async def test_search_performance(graphiti_client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_search_performance(graphiti_client, worker_group_id, embedding_cache):
     """Test search performance with warm cache."""
     # Add some data first
     await graphiti_client.add_episode(
@@ -119,25 +89,27 @@ async def test_search_performance(graphiti_client):
         episode_body="Testing search performance for Neo4j with multiple queries",
         source=EpisodeType.text,
         source_description="Performance test",
-        reference_time=datetime.now(timezone.utc)
+        reference_time=datetime.now(timezone.utc),
+        group_id=worker_group_id
     )
     
-    await asyncio.sleep(2)
-    
-    # Warm up
-    await graphiti_client.search("performance", num_results=5)
+    # Warm up (also caches the query embedding)
+    await graphiti_client.search("performance", group_ids=[worker_group_id], num_results=5)
     
     # Measure performance
+    misses = embedding_cache["misses"]
     start = time.perf_counter()
-    results = await graphiti_client.search("performance", num_results=10)
+    results = await graphiti_client.search("performance", group_ids=[worker_group_id], num_results=10)
     duration = time.perf_counter() - start
     
+    assert embedding_cache["misses"] == misses, "Timed search should reuse the cached query embedding"
+    
     print(f"Search took {duration*1000:.2f}ms")
     assert duration < 1.0, f"Search should be fast, took {duration:.3f}s"
 
 
-@pytest.mark.asyncio
-async def test_concurrent_searches(graphiti_client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_concurrent_searches(graphiti_client, worker_group_id):
     """Test concurrent search operations."""
     # Add test data
     await graphiti_client.add_episode(
@@ -145,17 +117,16 @@ async def test_concurrent_searches(graphiti_client):
         episode_body="Products: shoes, shirts, pants, jackets, hats",
         source=EpisodeType.text,
         source_description="Concurrent test",
-        reference_time=datetime.now(timezone.utc)
+        reference_time=datetime.now(timezone.utc),
+        group_id=worker_group_id
     )
     
-    await asyncio.sleep(2)
-    
     # Run concurrent searches
     queries = ["shoes", "shirts", "pants", "jackets", "hats"]
     
     async def search_task(query):
         start = time.perf_counter()
-        results = await graphiti_client.search(query, num_results=5)
+        results = await graphiti_client.search(query, group_ids=[worker_group_id], num_results=5)
         duration = time.perf_counter() - start
         return query, len(results), duration
     
@@ -169,8 +140,8 @@ async def test_concurrent_searches(graphiti_client):
         assert duration < 2.0, f"Query '{query}' took too long: {duration:.3f}s"
 
 
-@pytest.mark.asyncio
-async def test_episode_retrieval(graphiti_client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_episode_retrieval(graphiti_client, worker_group_id):
     """Test retrieving episodes."""
     # Add an episode
     await graphiti_client.add_episode(
@@ -178,15 +149,15 @@ async def test_episode_retrieval(graphiti_client):
         episode_body="Test episode for retrieval functionality",
         source=EpisodeType.text,
         source_description="Retrieval test",
-        reference_time=datetime.now(timezone.utc)
+        reference_time=datetime.now(timezone.utc),
+        group_id=worker_group_id
     )
     
-    await asyncio.sleep(2)
-    
     # Retrieve episodes
     episodes = await graphiti_client.retrieve_episodes(
         reference_time=datetime.now(timezone.utc),
-        last_n=5
+        last_n=5,
+        group_ids=[worker_group_id]
     )
     
     assert len(episodes) > 0, "Should retrieve recent episodes"